@@ -1,8 +1,13 @@
 from argparse import ArgumentParser
-from collections.abc import Sized
+from array import array
 from enum import Enum
-from os import path
-from typing import Union, BinaryIO, List, SupportsInt
+from io import BytesIO
+from mmap import mmap, ACCESS_READ
+from os import path, fstat
+from queue import Queue, Empty
+from sys import maxsize
+from threading import Thread, Event
+from typing import Union, BinaryIO, Callable
 
 
 class ProcedureType(Enum):
@@ -21,81 +26,35 @@ class ConstantCodes(Enum):
     END_OF_DATA = 257
 
 
-class Bits(Sized, SupportsInt):
-    """
-    Class to represent bits
-    """
-
-    def __init__(self, number: Union[int, List[bool]]):
-        """
-        Constructor of Bits class
-        :param number: if int then denotes the value of bits property else it's bits backwards
-        """
-        if type(number) is list:
-            self.bits = [number[-index] for index in range(1, len(number) + 1)]
-        else:
-            bits = []
-            key_str = f'{number:b}'
-            key_len = len(key_str)
-            for digit_index in range(1, key_len + 1):
-                bits.append(key_str[-digit_index] == '1')
-            self.bits = [bits[-index] for index in range(1, len(bits) + 1)]
-
-    def __len__(self):
-        """
-        Override of method that is used in len() built-in function
-        :return: Returns the length of the underlying bits array
-        """
-        return len(self.bits)
-
-    def binary_length(self):
-        """
-        Method to return the length of binary number that is represented by bits property
-        :return: Length of underlying number in binary
-        """
-        length = 0
-        for i in range(1, len(self.bits) + 1):
-            if self.bits[-i]:
-                length = i
-        return length
-
-    def __int__(self):
-        """
-        Override of method called while executing int() built-in function with Bits class as a parameter
-        :return: The integer value of Bits
-        """
-        integer = 0
-        for boolean in self.bits:
-            integer *= 2
-            integer += 1 if boolean else 0
-        return integer
-
-
 class CompressionDictionary:
     """
     Class to encapsulate compression dictionary
+
+    Words are stored as a trie: the key of a word is the code of its prefix (the word without the last byte)
+    shifted by 8 bits and combined with its last byte. Single bytes are not stored, their code is the byte itself.
     """
 
-    DICT_SIZE = 12  # Max size of a code stored in dictionary
+    DICT_SIZE = 16  # Default max size of a code stored in dictionary
 
-    def __init__(self):
+    def __init__(self, dict_size: int = DICT_SIZE):
         """
         Constructor of CompressionDictionary class
+        :param dict_size: Max size of a code stored in dictionary (in bits, from 9 to 16)
         """
+        if not 9 <= dict_size <= 16:
+            raise ValueError('Size of dictionary codes must be between 9 and 16 bits')
+        self.dict_size = dict_size
         self.dict = {}
         self.last_used_code = 257
 
-    def __getitem__(self, key: Union[bytes, ConstantCodes]) -> Bits:
+    def __getitem__(self, key: ConstantCodes) -> int:
         """
-        Method of indexing CompressionDictionary instance like a dictionary
-        :param key: Key value of which shall be retrieved
-        :return: Returns the Bits value corresponding to key
+        Method of indexing CompressionDictionary instance by the constant codes;
+        words are looked up in the dict attribute directly
+        :param key: Constant code to be retrieved
+        :return: Returns the value of the constant code
         """
-        if type(key) is ConstantCodes:
-            return Bits(key.value)
-        if len(key) == 1:
-            return Bits(key[0])
-        return self.dict[key]
+        return key.value
 
     def next_code(self) -> int:
         """
@@ -105,33 +64,13 @@ class CompressionDictionary:
         self.last_used_code += 1
         return self.last_used_code
 
-    def add(self, new_key: bytes) -> None:
+    def add(self, new_key: int) -> None:
         """
         Adds new word to the dictionary generating new code
-        :param new_key: Word to be stored
+        :param new_key: Key of the word to be stored
         :return: None
         """
-        new_bits = Bits(self.next_code())
-        if len(new_bits) > self.DICT_SIZE:
-            raise OverflowError("Compression dictionary is full")
-        self.dict[new_key] = new_bits
-
-    def __contains__(self, item: bytes) -> bool:
-        """
-        Implementation of in keyword for checking whether key-item is in dictionary
-        :param item: key to be checked
-        :return: boolean value
-        """
-        if len(item) == 1:
-            return True
-        return item in self.dict
-
-    def is_full(self) -> bool:
-        """
-        Checks whether the dictionary is full
-        :return: boolean value of fullness of the dictionary
-        """
-        return len(Bits(self.last_used_code + 1)) > self.DICT_SIZE
+        self.dict[new_key] = self.next_code()
 
     def clear(self) -> None:
         """
@@ -146,107 +85,112 @@ class CompressionBuffer:
     """
     Buffer for writing bytes to file
     """
+
+    BUFFER_SIZE = 64 * 1024  # Number of bytes collected before they are written to the file
+
     def __init__(self, out_file: BinaryIO):
         """
         Constructor of CompressionBuffer class
         :param out_file: File in which bytes will be written
         """
         self.out_file = out_file
-        self.not_written_bits = []
-
-    @staticmethod
-    def bits_to_bytes(bits: List[bool]) -> bytes:
-        """
-        Method to convert list of bits to bytes object
-        :param bits: List of bits to be converted
-        :return: Bytes representation of bits parameter
-        """
-        if len(bits) % 8 != 0:
-            raise ValueError()
-        integer = 0
-        for i in range(len(bits)):
-            integer *= 2
-            if bits[i]:
-                integer += 1
-        return integer.to_bytes(1, 'big', signed=False)
+        self.accumulator = 0
+        self.accumulator_bits = 0
+        self.not_written_bytes = bytearray()
+        self.written_bytes = 0
+        self.emitters = {}
 
-    def append(self, bits: Bits) -> None:
+    def append(self, code: int, bits_count: int) -> None:
         """
-        Method to append Bits object to file
-        :param bits: Bits object to be appended to the file
+        Method to append code of given bit width to file
+        :param code: Code to be appended to the file
+        :param bits_count: Number of bits the code occupies in the file
         :return: None
         """
-        for bit in bits.bits:
-            self.not_written_bits.append(bit)
-            if len(self.not_written_bits) == 8:
-                self.out_file.write(self.bits_to_bytes(self.not_written_bits))
-                self.not_written_bits.clear()
+        self.accumulator = (self.accumulator << bits_count) | code
+        self.accumulator_bits += bits_count
+        while self.accumulator_bits >= 8:
+            self.accumulator_bits -= 8
+            self.not_written_bytes.append((self.accumulator >> self.accumulator_bits) & 0xFF)
+        self.accumulator &= (1 << self.accumulator_bits) - 1
+        if len(self.not_written_bytes) >= self.BUFFER_SIZE:
+            self.written_bytes += len(self.not_written_bytes)
+            self.out_file.write(self.not_written_bytes)
+            self.not_written_bytes.clear()
+
+    def emitter(self, bits_count: int) -> Callable[[int], None]:
+        """
+        Method to create a function appending codes of one fixed width between 9 and 16 bits to file
+        :param bits_count: Number of bits the codes occupy in the file
+        :return: Function that appends given code to the file
+        """
+        if bits_count not in self.emitters:
+            if not 8 < bits_count <= 16:
+                raise ValueError('Width of specialized codes must be between 9 and 16 bits')
+            out_file = self.out_file
+            not_written_bytes = self.not_written_bytes
+            buffer_size = self.BUFFER_SIZE
+
+            def emit(code: int) -> None:
+                accumulator = (self.accumulator << bits_count) | code
+                accumulator_bits = self.accumulator_bits + bits_count - 8
+                if accumulator_bits >= 8:
+                    accumulator_bits -= 8
+                    not_written_bytes.append((accumulator >> (accumulator_bits + 8)) & 0xFF)
+                not_written_bytes.append((accumulator >> accumulator_bits) & 0xFF)
+                self.accumulator = accumulator & ((1 << accumulator_bits) - 1)
+                self.accumulator_bits = accumulator_bits
+                if len(not_written_bytes) >= buffer_size:
+                    self.written_bytes += len(not_written_bytes)
+                    out_file.write(not_written_bytes)
+                    not_written_bytes.clear()
+
+            self.emitters[bits_count] = emit
+        return self.emitters[bits_count]
+
+    def bits_count(self) -> int:
+        """
+        Method to count all the bits appended so far, including those not written to the file yet
+        :return: Number of appended bits
+        """
+        return (self.written_bytes + len(self.not_written_bytes)) * 8 + self.accumulator_bits
 
     def flush(self) -> None:
         """
         Method to flush not written bits to the file and finish writing by adding necessary bits to complete byte
         :return: None
         """
-        if len(self.not_written_bits) == 0:
-            return
-        self.append(Bits([False for _ in range(8 - len(self.not_written_bits))]))
-
-
-class ReaderBuffer:
-    """
-    Class created as an attempt to accelerate the program by buffering the input file; not much success
-    """
-    def __init__(self, in_file: BinaryIO, buffer_size: int = 1024 * 1024):
-        """
-        Constructor of ReaderBuffer
-        :param in_file: File to be read
-        :param buffer_size: Size of a buffer (in bytes)
-        """
-        self.in_file = in_file
-        self.current_index = 0
-        self.buffer_size = buffer_size
-        self.current_bytes = self.in_file.read(self.buffer_size)
-
-    def next_bytes(self) -> Union[bytes, None]:
-        """
-        Method to return nex byte of the file as a bytes object
-        :return: Next bytes
-        """
-        if self.current_index == len(self.current_bytes) and self.current_index < self.buffer_size:
-            return None
-        foo = self.current_bytes[self.current_index]
-        if self.current_index == self.buffer_size - 1:
-            self.current_index = 0
-            self.current_bytes = self.in_file.read(self.buffer_size)
-        else:
-            self.current_index += 1
-        return foo.to_bytes(1, byteorder='big', signed=False)
+        if self.accumulator_bits != 0:
+            self.append(0, 8 - self.accumulator_bits)
+        self.written_bytes += len(self.not_written_bytes)
+        self.out_file.write(self.not_written_bytes)
+        self.not_written_bytes.clear()
 
 
 class CompressionEngine:
     """
     Compression engine class
+
+    The compressed data starts with MAGIC and a header byte holding HEADER_FLAG and the max size of dictionary codes.
+    The input is split into frames of FRAME_SIZE bytes, each compressed with a new dictionary and written
+    prefixed by its compressed size. Once the dictionary is full it is frozen and it is cleared only when
+    the compression ratio of the last RATIO_WINDOW input bytes drops by more than RATIO_TOLERANCE below
+    the best one seen since.
     """
 
-    def __init__(self):
-        """
-        Constructor of CompressionEngine class
-        """
-        self.dict = CompressionDictionary()
+    MAGIC = b'LZW1'  # Marks data compressed in frames
+    HEADER_FLAG = 0x80  # Marks the header byte; data without header starts with a 9 bit code below 256
+    FRAME_SIZE = 4 * 1024 * 1024  # Number of input bytes compressed into one frame
+    FRAME_LENGTH_SIZE = 4  # Number of bytes holding the compressed size of a frame
+    RATIO_WINDOW = 1024 * 1024  # Number of input bytes after which the compression ratio is checked
+    RATIO_TOLERANCE = 0.05  # Relative drop of the compression ratio which makes the full dictionary to be cleared
 
-    @staticmethod
-    def pad(bits: Bits, length: int) -> Bits:
+    def __init__(self, dict_size: int = CompressionDictionary.DICT_SIZE):
         """
-        Method to give given Bits object given length
-        :param bits: Bits object to be padded by adding extra False bits to the beginning
-        :param length: Length of returned Bits object
-        :return: Bits object padded to given length
+        Constructor of CompressionEngine class
+        :param dict_size: Max size of a code stored in dictionary (in bits, from 9 to 16)
         """
-        new_bits = Bits([False for _ in range(length)])
-        for i in range(1, len(bits) + 1):
-            foo = bits.bits[len(bits) - i]
-            new_bits.bits[length - i] = foo
-        return new_bits
+        self.dict = CompressionDictionary(dict_size)
 
     def compress(self, in_file: BinaryIO, out_file: BinaryIO) -> None:
         """
@@ -255,160 +199,170 @@ class CompressionEngine:
         :param out_file: File to be written the compressed data in
         :return: None
         """
-        in_buffer = ReaderBuffer(in_file)
-        out_buffer = CompressionBuffer(out_file)
-
-        current_byte = in_buffer.next_bytes()
-        current_padding = 9
-
-        current_word = current_byte
-        current_byte = in_buffer.next_bytes()
-
-        while current_byte:
-            word = current_word + current_byte
-            if word in self.dict:
-                current_word = word
-                current_byte = in_buffer.next_bytes()
-                continue
-            if self.dict.is_full():
-                out_buffer.append(self.pad(self.dict[current_word], current_padding))
-                out_buffer.append(self.pad(self.dict[ConstantCodes.CLEAR_DICTIONARY], current_padding + 1))
-                self.dict.clear()
-                current_padding = 9
-            else:
-                out_buffer.append(self.pad(self.dict[current_word], current_padding))
-                self.dict.add(word)
-                if self.dict[word].binary_length() > current_padding:
-                    current_padding += 1
-                # out_buffer.append(self.pad(self.dict[current_word], current_padding))
-
-            current_word = current_byte
-            current_byte = in_buffer.next_bytes()
-        out_buffer.append(self.pad(self.dict[current_word], current_padding))
-
-        out_buffer.append(self.pad(self.dict[ConstantCodes.END_OF_DATA], current_padding))
-        out_buffer.flush()
-
-
-class DecompressionReaderBuffer:
-    """
-    Class to encapsulate work with the in file for decompression
-    """
+        out_file.write(self.MAGIC + bytes([self.HEADER_FLAG | self.dict.dict_size]))
+        if fstat(in_file.fileno()).st_size == 0:
+            return
 
-    def __init__(self, in_file: BinaryIO):
-        """
-        Constructor of DecompressionReaderBuffer
-        :param in_file: File to be read
-        """
-        self.in_file = in_file
-        self.not_yielded_bits = []
+        with mmap(in_file.fileno(), 0, access=ACCESS_READ) as data, memoryview(data) as view:
+            for frame_start in range(0, len(view), self.FRAME_SIZE):
+                frame = BytesIO()
+                with view[frame_start:frame_start + self.FRAME_SIZE] as frame_view:
+                    self.compress_frame(frame_view, frame)
+                frame_data = frame.getvalue()
+                out_file.write(len(frame_data).to_bytes(self.FRAME_LENGTH_SIZE, 'big'))
+                out_file.write(frame_data)
 
-    def add_bytes(self, next_bytes: bytes) -> None:
+    def compress_frame(self, view: memoryview, out_file: BinaryIO) -> None:
         """
-        Method to add bytes as bits to not_yielded_bits list
-        :param next_bytes: Bytes to be added
+        Method to compress one frame of the input with a new dictionary
+        :param view: Data of the frame
+        :param out_file: File to be written the compressed frame in
         :return: None
         """
-        for byte in next_bytes:
-            bits = Bits(byte).bits
-            for _ in range(8 - len(bits)):
-                self.not_yielded_bits.append(False)
-            for boo in bits:
-                self.not_yielded_bits.append(boo)
+        self.dict.clear()
+        out_buffer = CompressionBuffer(out_file)
 
-    def next_bits(self, bits_count: int) -> Union[Bits, None]:
-        """
-        Method to yield next n bits of in file
-        :param bits_count: Number of bits to be yielded
-        :return: Bits object representing the bits in the in file
-        """
-        bits = Bits([False for _ in range(bits_count)])
-        while bits_count > len(self.not_yielded_bits):
-            foo = self.in_file.read(1)
-            if len(foo) == 0:
-                break
-            self.add_bytes(foo)
-        for i in range(min([bits_count, len(self.not_yielded_bits)])):
-            bits.bits[i] = self.not_yielded_bits[0]
-            self.not_yielded_bits.pop(0)
-        return bits
+        # Hot loop: bound methods and constants are kept in local variables
+        find_code = self.dict.dict.get
+        clear_code = self.dict[ConstantCodes.CLEAR_DICTIONARY]
+        max_code = 1 << self.dict.dict_size
+        current_padding = 9
+        padding_limit = 1 << current_padding
+        emit = out_buffer.emitter(current_padding)
+
+        best_ratio = None
+        clear_requested = False
+        window_bits = out_buffer.bits_count()
+
+        current_code = view[0]
+        for window_start in range(1, len(view), self.RATIO_WINDOW):
+            for byte in view[window_start:window_start + self.RATIO_WINDOW]:
+                word = (current_code << 8) | byte
+                code = find_code(word)
+                if code is not None:
+                    current_code = code
+                    continue
+                emit(current_code)
+                if self.dict.last_used_code + 1 < max_code:
+                    self.dict.add(word)
+                    if self.dict.last_used_code == padding_limit:
+                        current_padding += 1
+                        padding_limit <<= 1
+                        emit = out_buffer.emitter(current_padding)
+                elif clear_requested:
+                    # Clear code has the current width; the decompressor does not widen codes of a full dictionary
+                    emit(clear_code)
+                    self.dict.clear()
+                    current_padding = 9
+                    padding_limit = 1 << current_padding
+                    emit = out_buffer.emitter(current_padding)
+                    clear_requested = False
+
+                current_code = byte
+
+            bits_count = out_buffer.bits_count()
+            if self.dict.last_used_code + 1 >= max_code:
+                ratio = self.RATIO_WINDOW * 8 / max(bits_count - window_bits, 1)
+                if best_ratio is None or ratio > best_ratio:
+                    best_ratio = ratio
+                elif ratio < best_ratio * (1 - self.RATIO_TOLERANCE):
+                    best_ratio = None
+                    clear_requested = True
+            window_bits = bits_count
+
+        out_buffer.append(current_code, current_padding)
+
+        out_buffer.append(self.dict[ConstantCodes.END_OF_DATA], current_padding)
+        out_buffer.flush()
 
 
 class DecompressionDictionary:
     """
     Class to represent decompression dictionary
+
+    Every word of the dictionary has already been decoded, so instead of storing its bytes
+    the dictionary keeps all the data decoded since it was last cleared and stores only
+    the offset and length of each word within that data. The decoded data is preceded by all 256 single bytes,
+    so single-byte codes are stored the same way as the others.
     """
 
-    def __init__(self):
+    DICT_SIZE = 12  # Max size of a code stored in dictionary of data without header
+    ALPHABET_SIZE = 256  # Number of single bytes preceding the decoded data
+
+    def __init__(self, dict_size: int = DICT_SIZE):
         """
         Constructor of DecompressionDictionary
+        :param dict_size: Max size of a code stored in dictionary (in bits)
         """
-        self.dict = [i.to_bytes(1, byteorder='big', signed=False) for i in range(256)]
-        self.dict.append(b'0')
-        self.dict.append(b'0')
+        self.dict_size = dict_size
+        size = 1 << dict_size
+        self.decoded = bytearray(range(self.ALPHABET_SIZE))
+        self.offsets = array('q', range(self.ALPHABET_SIZE)) + array('q', [0]) * (size - self.ALPHABET_SIZE)
+        self.lengths = array('q', [1]) * self.ALPHABET_SIZE + array('q', [0]) * (size - self.ALPHABET_SIZE)
         self.last_used_index = 257
 
-    def __getitem__(self, key: Bits) -> bytes:
-        """
-        Method to override indexing of the class as of a dictionary
-        :param key: Code of bits whose corresponding word will be retrieved
-        :return: The word represented by key code
-        """
-        return self.dict[int(key)]
-
-    def __contains__(self, item: Bits) -> bool:
-        """
-        Method that overrides the usage of in keyword - to check whether given code is in dictionary
-        :param item: Bits representing the code to be checked
-        :return: Boolean value of the check
-        """
-        return int(item) <= self.last_used_index
-
     def clear(self) -> None:
         """
         Method that clears the dictionary
         :return: None
         """
+        del self.decoded[self.ALPHABET_SIZE:]
         self.last_used_index = 257
 
-    def add(self, value: bytes) -> None:
-        """
-        Method that adds given bytes value to the dictionary while generating its code
-        :param value: Word to be added to the dictionary
-        :return: None
-        """
-        self.last_used_index += 1
-        if self.last_used_index == len(self.dict):
-            self.dict.append(value)
-        else:
-            self.dict[self.last_used_index] = value
-
-    def len_of_last(self) -> int:
-        """
-        Method to retrieve information about the length of last used code in binary
-        :return: Integer that represents the length of the last code in binary
-        """
-        return len(f'{self.last_used_index:b}')
-
-    def is_full_in_order(self) -> bool:
-        """
-        Method that checks whether the dictionary is full in order i.e. the next code will be represented by longer bits
-        :return: Boolean value of the result of the check
-        """
-        return not f'{self.last_used_index:b}'.__contains__('0')
-
 
 class DecompressionEngine:
     """
     Decompression engine class
     """
 
+    OUTPUT_WINDOW = 1024 * 1024  # Number of bytes decoded with a full dictionary before they are written to the file
+    PREFETCHED_FRAMES = 2  # Number of compressed frames read ahead while a frame is being decompressed
+
     def __init__(self):
         """
         Constructor of DecompressionEngine class
         """
         self.dict = DecompressionDictionary()
 
+    @staticmethod
+    def header_dict_size(header: int) -> int:
+        """
+        Method to retrieve the max size of dictionary codes from the header byte of compressed data
+        :param header: Header byte
+        :return: Max size of a code stored in dictionary (in bits)
+        """
+        dict_size = header & ~CompressionEngine.HEADER_FLAG
+        if not 9 <= dict_size <= 16:
+            raise ValueError(f'Unsupported size of dictionary codes: {dict_size}')
+        return dict_size
+
+    @staticmethod
+    def read_frames(in_file: BinaryIO, frames: Queue, stop: Event) -> None:
+        """
+        Method to read compressed frames from file one by one into a queue; ends by putting None in the queue
+        or the error that occurred while reading
+        :param in_file: File to be read, positioned at the beginning of a frame
+        :param frames: Queue to be filled with the frames
+        :param stop: Event telling the method to stop reading
+        :return: None
+        """
+        try:
+            while not stop.is_set():
+                frame_length = in_file.read(CompressionEngine.FRAME_LENGTH_SIZE)
+                if len(frame_length) == 0:
+                    break
+                if len(frame_length) < CompressionEngine.FRAME_LENGTH_SIZE:
+                    raise EOFError('Compressed data ended in a frame length')
+                frame_length = int.from_bytes(frame_length, 'big')
+                frame = in_file.read(frame_length)
+                if len(frame) < frame_length:
+                    raise EOFError('Compressed data ended in the middle of a frame')
+                frames.put(frame)
+        except Exception as error:
+            frames.put(error)
+            return
+        frames.put(None)
+
     def decompress(self, in_file: BinaryIO, out_file: BinaryIO) -> None:
         """
         Implementation of Lempel-Ziv-Welch 84 decompression algorithm
@@ -416,43 +370,154 @@ class DecompressionEngine:
         :param out_file: File in which the decompressed data will be written
         :return: None
         """
-        in_buffer = DecompressionReaderBuffer(in_file)
+        if fstat(in_file.fileno()).st_size == 0:
+            return
+
+        if in_file.read(len(CompressionEngine.MAGIC)) == CompressionEngine.MAGIC:
+            header = in_file.read(1)
+            if len(header) == 0:
+                raise EOFError('Compressed data ended in the header')
+            dict_size = self.header_dict_size(header[0])
+
+            # The next frame is read in another thread while the current one is being decompressed
+            frames = Queue(self.PREFETCHED_FRAMES)
+            stop = Event()
+            reader = Thread(target=self.read_frames, args=(in_file, frames, stop), daemon=True)
+            reader.start()
+            try:
+                while True:
+                    frame = frames.get()
+                    if frame is None:
+                        break
+                    if isinstance(frame, Exception):
+                        raise frame
+                    self.decompress_stream(frame, 0, dict_size, dict_size, out_file)
+            finally:
+                # The reader may be blocked on the full queue, so it is drained until the reader stops
+                stop.set()
+                while reader.is_alive():
+                    try:
+                        frames.get_nowait()
+                    except Empty:
+                        reader.join(0.01)
+            return
+
+        # Data without the magic was compressed by older versions as a single stream of 12 bit codes;
+        # the dictionary was cleared as soon as it was full and the clear code was written one bit wider
+        with mmap(in_file.fileno(), 0, access=ACCESS_READ) as data:
+            dict_size = DecompressionDictionary.DICT_SIZE
+            self.decompress_stream(data, 0, dict_size, dict_size + 1, out_file)
+
+    def decompress_stream(
+            self,
+            data: Union[bytes, mmap],
+            position: int,
+            dict_size: int,
+            max_padding: int,
+            out_file: BinaryIO
+    ) -> None:
+        """
+        Method to decompress one stream of codes ended by the end of data code, starting with a new dictionary
+        :param data: Compressed data
+        :param position: Position of the stream in the data
+        :param dict_size: Max size of a code stored in dictionary (in bits)
+        :param max_padding: Max size of a code in the stream (in bits)
+        :param out_file: File in which the decompressed data will be written
+        :return: None
+        """
+        if self.dict.dict_size != dict_size:
+            self.dict = DecompressionDictionary(dict_size)
+        else:
+            self.dict.clear()
+
+        # Hot loop: the dictionary arrays, bound methods and constants are kept in local variables
+        # and the dictionary is updated in place rather than through method calls
+        write = out_file.write
+        decoded = self.dict.decoded
+        offsets = self.dict.offsets
+        lengths = self.dict.lengths
+        alphabet_size = self.dict.ALPHABET_SIZE
+        max_code = 1 << dict_size
+        end_code = ConstantCodes.END_OF_DATA.value
+        clear_code = ConstantCodes.CLEAR_DICTIONARY.value
+        data_length = len(data)
+        bit_buffer = 0
+        bits_available = 0
+
         current_padding = 9
-        current_bits = in_buffer.next_bits(current_padding)
-        current_word = self.dict[current_bits]
-        last_word = current_word
-        current_bits = in_buffer.next_bits(current_padding)
-        while int(current_bits) != ConstantCodes.END_OF_DATA.value:
-            out_file.write(last_word)
-            if int(current_bits) == ConstantCodes.CLEAR_DICTIONARY.value:
+        padding_limit = 1 << current_padding
+        # Once the dictionary is full, the data decoded after its last word are written out every OUTPUT_WINDOW
+        # bytes and dropped; until then all the decoded data are kept, so flush_limit is never reached
+        written_offset = alphabet_size
+        frozen_offset = None
+        flush_limit = maxsize
+        last_offset = None
+        while True:
+            while bits_available < current_padding:
+                if position >= data_length:
+                    raise EOFError('Compressed data ended without the end of data code')
+                chunk = data[position:position + 32]
+                position += 32
+                chunk_bits = len(chunk) << 3
+                bit_buffer = (bit_buffer << chunk_bits) | int.from_bytes(chunk, 'big')
+                bits_available += chunk_bits
+            bits_available -= current_padding
+            current_code = bit_buffer >> bits_available
+            bit_buffer &= (1 << bits_available) - 1
+
+            if current_code == end_code:
+                break
+            if current_code == clear_code:
+                write(decoded[written_offset:])
                 self.dict.clear()
                 current_padding = 9
-                current_bits = in_buffer.next_bits(current_padding)
-                last_word = self.dict[current_bits]
-                current_bits = in_buffer.next_bits(current_padding)
+                padding_limit = 1 << current_padding
+                written_offset = alphabet_size
+                flush_limit = maxsize
+                last_offset = None
                 continue
 
-            if current_bits not in self.dict:
-                current_word = last_word + last_word[0].to_bytes(1, byteorder='big', signed=False)
-                self.dict.add(current_word)
-            else:
-                current_word = self.dict[current_bits]
-                self.dict.add(last_word + current_word[0].to_bytes(1, byteorder='big', signed=False))
-
-            last_word = current_word
-            if self.dict.is_full_in_order():
-                current_padding += 1
-            current_bits = in_buffer.next_bits(current_padding)
-
-        out_file.write(last_word)
-
-
-def main(procedure_type: ProcedureType, in_file: str, out_file: Union[str, None]) -> None:
+            current_offset = len(decoded)
+            if last_offset is not None and self.dict.last_used_index + 1 < max_code:
+                # New word is the last one followed by the first byte of the word being decoded
+                self.dict.last_used_index += 1
+                offsets[self.dict.last_used_index] = last_offset
+                lengths[self.dict.last_used_index] = current_offset - last_offset + 1
+                if self.dict.last_used_index + 1 == padding_limit and current_padding < max_padding:
+                    current_padding += 1
+                    padding_limit <<= 1
+                if self.dict.last_used_index + 1 == max_code:
+                    frozen_offset = current_offset + 1
+                    flush_limit = frozen_offset + self.OUTPUT_WINDOW
+
+            word_offset = offsets[current_code]
+            word_end = word_offset + lengths[current_code]
+            decoded += decoded[word_offset:word_end]
+            if word_end > current_offset:
+                # The word has just been added and ends with its own first byte which was not decoded yet
+                decoded.append(decoded[word_offset])
+            last_offset = current_offset
+
+            if len(decoded) >= flush_limit:
+                write(decoded[written_offset:])
+                del decoded[frozen_offset:]
+                written_offset = frozen_offset
+
+        write(decoded[written_offset:])
+
+
+def main(
+        procedure_type: ProcedureType,
+        in_file: str,
+        out_file: Union[str, None],
+        max_bits: int = CompressionDictionary.DICT_SIZE
+) -> None:
     """
     Main function of the lzw program
     :param procedure_type: Type of procedure to be conducted - decompression or compression
     :param in_file: File to be processed
     :param out_file: File to be written in the product of the program process
+    :param max_bits: Max size of a code stored in compression dictionary (in bits)
     :return: None
     """
     if procedure_type == ProcedureType.COMPRESS:
@@ -460,8 +525,8 @@ def main(procedure_type: ProcedureType, in_file: str, out_file: Union[str, None]
             with open(in_file, mode='rb') as in_stream:
                 if out_file is None:
                     out_file = '.'.join([path.splitext(in_file)[0], 'lzw'])
-                with open(out_file, mode='wb') as out_stream:
-                    CompressionEngine().compress(in_stream, out_stream)
+                with open(out_file, mode='wb', buffering=1024 * 1024) as out_stream:
+                    CompressionEngine(max_bits).compress(in_stream, out_stream)
         except FileNotFoundError:
             print('Given file does not exist')
     else:
@@ -469,7 +534,7 @@ def main(procedure_type: ProcedureType, in_file: str, out_file: Union[str, None]
             with open(in_file, mode='rb') as in_stream:
                 if out_file is None:
                     out_file = '.'.join([path.splitext(in_file)[0], 'txt'])
-                with open(out_file, mode='wb') as out_stream:
+                with open(out_file, mode='wb', buffering=1024 * 1024) as out_stream:
                     DecompressionEngine().decompress(in_stream, out_stream)
         except FileNotFoundError:
             print('Given file does not exist')
@@ -498,9 +563,18 @@ if __name__ == "__main__":
         help='Destination file of the process; if not specified,'
              'path given as in_file will be used with changed extension'
     )
+    parser.add_argument(
+        '--maxbits',
+        default=CompressionDictionary.DICT_SIZE,
+        type=int,
+        choices=range(9, 17),
+        metavar='{9..16}',
+        help='Max size of a code stored in compression dictionary in bits; ignored when decompressing'
+    )
     args = parser.parse_args()
     main(
         procedure_type=ProcedureType.DECOMPRESS if args.decompress else ProcedureType.COMPRESS,
         in_file=args.in_file,
-        out_file=args.out_file
+        out_file=args.out_file,
+        max_bits=args.maxbits
     )